@@ -3,10 +3,281 @@ Text chunking utilities for splitting documents into manageable pieces.
 """
 import logging
 import os
-from typing import List, Optional
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import tiktoken
+
+try:
+    import numba
+    from numba import prange
+except ImportError:  # Numba is optional; the pure-Python splitter is used without it
+    numba = None
+    prange = range
 
 logger = logging.getLogger(__name__)
 
+# Code points per block of the parallel separator scan
+_SCAN_BLOCK = 1 << 16
+
+# Numba's default workqueue threading layer aborts the process if two threads
+# enter a parallel kernel at once, and Streamlit sessions chunk on their own
+# threads, so parallel scans are run one at a time
+_SCAN_LOCK = threading.Lock()
+
+
+def _find_spans(
+    text_length: int,
+    chunk_size: int,
+    chunk_overlap: int,
+    sep_breaks: np.ndarray,
+    sep_bounds: np.ndarray,
+    all_breaks: np.ndarray,
+) -> np.ndarray:
+    """
+    Compiled counterpart of the span loop in DocumentChunker._split_spans.
+
+    ``sep_breaks`` holds every separator's sorted break offsets back to back
+    in priority order, with separator k's offsets at
+    ``sep_breaks[sep_bounds[k]:sep_bounds[k + 1]]``. Returns an (N, 2) array
+    of (start, end) offsets.
+    """
+    spans = np.empty((16, 2), dtype=np.int64)
+    count = 0
+    start = 0
+    while start < text_length:
+        limit = start + chunk_size
+        end = limit
+        if limit >= text_length:
+            end = text_length
+        else:
+            found = False
+            for floor in (start + chunk_size // 2, start):
+                for k in range(len(sep_bounds) - 1):
+                    lo = sep_bounds[k]
+                    hi = sep_bounds[k + 1]
+                    idx = lo + np.searchsorted(sep_breaks[lo:hi], limit, side='right') - 1
+                    if idx >= lo and sep_breaks[idx] > floor:
+                        end = sep_breaks[idx]
+                        found = True
+                        break
+                if found:
+                    break
+
+        if count == spans.shape[0]:
+            grown = np.empty((count * 2, 2), dtype=np.int64)
+            grown[:count] = spans
+            spans = grown
+        spans[count, 0] = start
+        spans[count, 1] = end
+        count += 1
+
+        if end >= text_length:
+            break
+
+        idx = np.searchsorted(all_breaks, max(end - chunk_overlap, start + 1), side='left')
+        next_start = all_breaks[idx] if idx < len(all_breaks) else end
+        start = min(next_start, end)
+
+    return spans[:count]
+
+
+def _sep_matches(
+    codes: np.ndarray,
+    sep_codes: np.ndarray,
+    sep_lengths: np.ndarray,
+    k: int,
+    i: int,
+) -> bool:
+    """Whether separator ``k`` occurs in ``codes`` at offset ``i``."""
+    length = sep_lengths[k]
+    if i + length > len(codes):
+        return False
+    j = 0
+    while j < length and codes[i + j] == sep_codes[k, j]:
+        j += 1
+    return j == length
+
+
+def _is_sync_point(
+    codes: np.ndarray,
+    sep_codes: np.ndarray,
+    sep_lengths: np.ndarray,
+    p: int,
+) -> bool:
+    """
+    Whether a scan reaches offset ``p`` whichever earlier offset it started at.
+
+    A scan can only step over ``p`` by matching a separator that starts
+    before ``p`` and ends after it, so ``p`` is safe when no such match exists.
+    """
+    for k in range(len(sep_lengths)):
+        for d in range(1, sep_lengths[k]):
+            if p - d >= 0 and _sep_matches(codes, sep_codes, sep_lengths, k, p - d):
+                return False
+    return True
+
+
+def _scan_segment(
+    codes: np.ndarray,
+    sep_codes: np.ndarray,
+    sep_lengths: np.ndarray,
+    start: int,
+    stop: int,
+    ends: np.ndarray,
+    kinds: np.ndarray,
+    offset: int,
+) -> int:
+    """
+    Scan ``codes[start:stop]`` for separators and return the number of matches.
+
+    At each offset the first matching separator wins and scanning resumes
+    after it. Match ends and separator indexes are written to ``ends`` and
+    ``kinds`` from ``offset`` on, unless ``offset`` is negative.
+    """
+    count = 0
+    i = start
+    while i < stop:
+        matched = -1
+        for k in range(len(sep_lengths)):
+            if _sep_matches(codes, sep_codes, sep_lengths, k, i):
+                matched = k
+                break
+        if matched < 0:
+            i += 1
+            continue
+        i += sep_lengths[matched]
+        if offset >= 0:
+            ends[offset + count] = i
+            kinds[offset + count] = matched
+        count += 1
+    return count
+
+
+def _scan_breaks(
+    codes: np.ndarray,
+    sep_codes: np.ndarray,
+    sep_lengths: np.ndarray,
+    block_size: int = _SCAN_BLOCK,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compiled counterpart of the separator regex scan in DocumentChunker._split_spans.
+
+    ``codes`` is the text as code points. Separators are rows of ``sep_codes``
+    (``sep_lengths`` gives each one's length) in priority order, and are
+    matched like the regex alternation. The text is scanned in blocks of
+    ``block_size`` code points in parallel; each block starts at its first
+    sync point (see _is_sync_point), so the matches are exactly those of a
+    single left-to-right scan. Returns ``(sep_breaks, sep_bounds, all_breaks)``
+    as consumed by _find_spans.
+    """
+    n = len(codes)
+    n_seps = len(sep_lengths)
+    n_blocks = max((n + block_size - 1) // block_size, 1)
+
+    # Where each block's scan starts; a block without a sync point is
+    # covered by the scan of the block before it
+    starts = np.empty(n_blocks + 1, dtype=np.int64)
+    starts[0] = 0
+    starts[n_blocks] = n
+    for b in prange(1, n_blocks):
+        starts[b] = -1
+        for p in range(b * block_size, min((b + 1) * block_size, n)):
+            if _is_sync_point(codes, sep_codes, sep_lengths, p):
+                starts[b] = p
+                break
+    for b in range(n_blocks - 1, 0, -1):
+        if starts[b] < 0:
+            starts[b] = starts[b + 1]
+
+    # Two passes over the blocks: count matches, then record them in place
+    counts = np.empty(n_blocks, dtype=np.int64)
+    unused = np.empty(0, dtype=np.int64)
+    for b in prange(n_blocks):
+        counts[b] = _scan_segment(
+            codes, sep_codes, sep_lengths, starts[b], starts[b + 1], unused, unused, -1
+        )
+    offsets = np.zeros(n_blocks + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    total = offsets[n_blocks]
+
+    ends = np.empty(total, dtype=np.int64)
+    kinds = np.empty(total, dtype=np.int64)
+    for b in prange(n_blocks):
+        _scan_segment(
+            codes, sep_codes, sep_lengths, starts[b], starts[b + 1], ends, kinds, offsets[b]
+        )
+
+    # Group break offsets by separator, keeping each group sorted
+    sep_bounds = np.zeros(n_seps + 1, dtype=np.int64)
+    for idx in range(total):
+        sep_bounds[kinds[idx] + 1] += 1
+    sep_bounds = np.cumsum(sep_bounds)
+
+    sep_breaks = np.empty(total, dtype=np.int64)
+    fill = sep_bounds[:-1].copy()
+    for idx in range(total):
+        sep_breaks[fill[kinds[idx]]] = ends[idx]
+        fill[kinds[idx]] += 1
+
+    return sep_breaks, sep_bounds, ends
+
+
+if numba is not None:
+    _find_spans = numba.njit(cache=True)(_find_spans)
+    _sep_matches = numba.njit(cache=True)(_sep_matches)
+    _is_sync_point = numba.njit(cache=True)(_is_sync_point)
+    _scan_segment = numba.njit(cache=True)(_scan_segment)
+    _scan_breaks = numba.njit(cache=True, parallel=True)(_scan_breaks)
+
+
+def resolve_chunk_settings(
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> Tuple[int, int, str]:
+    """
+    Fill in unset chunk settings from the environment.
+
+    Returns:
+        Tuple of (chunk_size, chunk_overlap, mode)
+    """
+    return (
+        chunk_size or int(os.getenv('CHUNK_SIZE', '1000')),
+        chunk_overlap or int(os.getenv('CHUNK_OVERLAP', '200')),
+        mode or os.getenv('CHUNK_MODE', 'char'),
+    )
+
+
+def chunk_stats(chunks: List[dict]) -> dict:
+    """
+    Get statistics about the chunks.
+
+    Args:
+        chunks: List of chunk dictionaries
+
+    Returns:
+        Dictionary with chunk statistics
+    """
+    if not chunks:
+        return {'total_chunks': 0}
+
+    # One C-level reduction per statistic over a packed array of sizes
+    sizes = np.fromiter(
+        (len(chunk['text']) for chunk in chunks), dtype=np.int64, count=len(chunks)
+    )
+
+    return {
+        'total_chunks': int(sizes.size),
+        'avg_chunk_size': float(sizes.mean()),
+        'min_chunk_size': int(sizes.min()),
+        'max_chunk_size': int(sizes.max()),
+        'total_characters': int(sizes.sum()),
+    }
+
 
 class DocumentChunker:
     """Splits documents into chunks for embedding and retrieval."""
@@ -15,62 +286,180 @@ class DocumentChunker:
         self,
         chunk_size: Optional[int] = None,
         chunk_overlap: Optional[int] = None,
+        mode: Optional[str] = None,
+        encoding: Optional[tiktoken.Encoding] = None,
     ):
         """
         Initialize the document chunker.
 
         Args:
-            chunk_size: Maximum size of each chunk in characters
-            chunk_overlap: Number of characters to overlap between chunks
+            chunk_size: Maximum size of each chunk (characters or tokens, per mode)
+            chunk_overlap: Size of the overlap between chunks (same unit as chunk_size)
+            mode: 'char' to size chunks in characters, 'token' to size them in tokens
+            encoding: Tokenizer for token mode (defaults to tiktoken's cl100k_base)
         """
-        self.chunk_size = chunk_size or int(os.getenv('CHUNK_SIZE', '1000'))
-        self.chunk_overlap = chunk_overlap or int(os.getenv('CHUNK_OVERLAP', '200'))
+        self.chunk_size, self.chunk_overlap, self.mode = resolve_chunk_settings(
+            chunk_size, chunk_overlap, mode
+        )
         self.separators = ["\n\n", "\n", ". ", " ", ""]
+        self._encoding = encoding
 
-        logger.info(
-            f"Initialized chunker with size={self.chunk_size}, "
-            f"overlap={self.chunk_overlap}"
+        # Non-empty separators in priority order, matched as one alternation
+        # whose group number identifies the separator
+        self._break_separators = tuple(sep for sep in self.separators if sep)
+        self._separator_re = re.compile(
+            "|".join(f"({re.escape(sep)})" for sep in self._break_separators)
         )
 
-    def _split_text(self, text: str) -> List[str]:
-        """Split text into chunks using separators."""
-        chunks = []
+        # The same separators as padded code point rows for the compiled scan
+        self._sep_lengths = np.array([len(sep) for sep in self._break_separators], dtype=np.int64)
+        self._sep_codes = np.zeros(
+            (len(self._break_separators), int(self._sep_lengths.max())), dtype=np.uint32
+        )
+        for row, sep in enumerate(self._break_separators):
+            self._sep_codes[row, :len(sep)] = [ord(char) for char in sep]
 
-        def split_by_separator(text_to_split: str, separators: List[str]) -> List[str]:
-            if not separators:
-                return [text_to_split]
+        if self.mode not in ('char', 'token'):
+            raise ValueError(f"Unsupported chunking mode: {self.mode}. Use 'char' or 'token'")
 
-            separator = separators[0]
-            remaining_separators = separators[1:]
+        logger.info(
+            f"Initialized chunker with size={self.chunk_size}, "
+            f"overlap={self.chunk_overlap}, mode={self.mode}"
+        )
 
-            splits = text_to_split.split(separator) if separator else [text_to_split]
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer used in token mode, loaded on first use."""
+        if self._encoding is None:
+            self._encoding = tiktoken.get_encoding('cl100k_base')
+        return self._encoding
 
-            result = []
-            for split in splits:
-                if len(split) > self.chunk_size:
-                    result.extend(split_by_separator(split, remaining_separators))
-                elif split:
-                    result.append(split + (separator if separator and split != splits[-1] else ""))
+    def _find_break(self, breaks: Dict[str, List[int]], start: int, limit: int) -> int:
+        """
+        Find where to end a chunk that starts at ``start``.
 
-            return result
+        Prefers the last boundary of the highest-priority separator in the back
+        half of the window, then anywhere in the window, and finally cuts hard
+        at ``limit`` when the window contains no separator at all.
+        """
+        for floor in (start + self.chunk_size // 2, start):
+            for separator in self._break_separators:
+                positions = breaks[separator]
+                if not positions:
+                    continue
+                idx = bisect_right(positions, limit) - 1
+                if idx >= 0 and positions[idx] > floor:
+                    return positions[idx]
+        return limit
+
+    def _split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Compute overlapping chunk boundaries in a single forward pass.
 
-        # First pass: split by separators
-        initial_chunks = split_by_separator(text, self.separators)
+        Separator offsets are collected once up front; each chunk boundary is
+        then a binary search over those offsets instead of a recursive
+        split-and-recombine of the text.
 
-        # Second pass: combine small chunks and handle overlap
-        current_chunk = ""
-        for chunk in initial_chunks:
-            if len(current_chunk) + len(chunk) <= self.chunk_size:
-                current_chunk += chunk
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = chunk
+        Returns:
+            (start, end) offsets of each chunk, in order
+        """
+        text_length = len(text)
+        if text_length <= self.chunk_size:
+            # Already fits: skip the separator scan entirely
+            return [(0, text_length)]
+
+        if numba is not None:
+            # Scan and split at native speed on the text's code points; lone
+            # surrogates are kept as single code units so offsets still line up
+            codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            with _SCAN_LOCK:
+                breaks = _scan_breaks(codes, self._sep_codes, self._sep_lengths)
+            spans = _find_spans(text_length, self.chunk_size, self.chunk_overlap, *breaks)
+            return [(int(start), int(end)) for start, end in spans]
+
+        # One regex pass over the text; the matching group tells which
+        # separator was found, and match ends arrive already sorted
+        breaks = {separator: [] for separator in self._break_separators}
+        all_breaks = []
+        for match in self._separator_re.finditer(text):
+            end = match.end()
+            breaks[self._break_separators[match.lastindex - 1]].append(end)
+            all_breaks.append(end)
+
+        spans = []
+        start = 0
+        while start < text_length:
+            limit = start + self.chunk_size
+            end = text_length if limit >= text_length else self._find_break(breaks, start, limit)
+            spans.append((start, end))
+
+            if end >= text_length:
+                break
+
+            # Step back by the overlap, snapping forward to the next boundary
+            # after the current start so the following chunk does not start
+            # mid-word; without such a boundary, continue from the cut
+            idx = bisect_left(all_breaks, max(end - self.chunk_overlap, start + 1))
+            next_start = all_breaks[idx] if idx < len(all_breaks) else end
+            start = min(next_start, end)
+
+        return spans
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+    def _split_text(self, text: str) -> List[str]:
+        """Split text into overlapping, whitespace-trimmed chunks."""
+        chunks = (text[start:end].strip() for start, end in self._split_spans(text))
+        return [chunk for chunk in chunks if chunk]
+
+    def _split_tokens(self, token_ids: List[int]) -> List[List[int]]:
+        """Split a token id sequence into overlapping fixed-size windows."""
+        step = max(self.chunk_size - self.chunk_overlap, 1)
+        windows = []
+        for start in range(0, len(token_ids), step):
+            windows.append(token_ids[start:start + self.chunk_size])
+            if start + self.chunk_size >= len(token_ids):
+                break
+        return windows
+
+    def _split_texts(self, texts: List[str]) -> List[List[str]]:
+        """
+        Split several texts into chunks, one list of chunks per text.
 
-        return chunks
+        In token mode all texts are encoded in one batch call and all chunk
+        windows decoded in another, so the tokenizer is only entered twice
+        regardless of how many documents there are.
+        """
+        if self.mode == 'char':
+            return [self._split_text(text) if text.strip() else [] for text in texts]
+
+        windows_per_text = [
+            self._split_tokens(token_ids)
+            for token_ids in self.encoding.encode_ordinary_batch(texts)
+        ]
+        decoded = iter(self.encoding.decode_batch(list(chain.from_iterable(windows_per_text))))
+
+        split_texts = []
+        for windows in windows_per_text:
+            chunks = [next(decoded).strip() for _ in windows]
+            split_texts.append([chunk for chunk in chunks if chunk])
+        return split_texts
+
+    def _attach_metadata(self, chunks: List[str], metadata: Optional[dict]) -> List[dict]:
+        """Wrap chunk texts in dictionaries carrying per-chunk metadata."""
+        base = metadata or {}
+        total_chunks = len(chunks)
+
+        return [
+            {
+                'text': chunk,
+                'metadata': {
+                    **base,
+                    'chunk_index': idx,
+                    'total_chunks': total_chunks,
+                    'chunk_size': len(chunk),
+                },
+            }
+            for idx, chunk in enumerate(chunks)
+        ]
 
     def chunk_text(self, text: str, metadata: Optional[dict] = None) -> List[dict]:
         """
@@ -88,30 +477,77 @@ class DocumentChunker:
             return []
 
         try:
-            chunks = self._split_text(text)
+            chunks = self._split_texts([text])[0]
+            chunked_documents = self._attach_metadata(chunks, metadata)
 
-            # Attach metadata to each chunk
-            chunked_documents = []
-            for idx, chunk in enumerate(chunks):
-                chunk_metadata = metadata.copy() if metadata else {}
-                chunk_metadata.update({
-                    'chunk_index': idx,
-                    'total_chunks': len(chunks),
-                    'chunk_size': len(chunk),
-                })
-
-                chunked_documents.append({
-                    'text': chunk,
-                    'metadata': chunk_metadata,
-                })
-
-            logger.info(f"Split text into {len(chunks)} chunks")
+            logger.info("Split text into %d chunks", len(chunks))
             return chunked_documents
 
         except Exception as e:
             logger.error(f"Error chunking text: {e}")
             raise
 
+    def chunk_stream(
+        self,
+        text_iter: Iterable[str],
+        metadata: Optional[dict] = None,
+    ) -> Iterator[dict]:
+        """
+        Chunk text that arrives in pieces, such as the pages of a PDF.
+
+        Pieces are joined with blank lines into a rolling buffer, and every
+        chunk that can no longer change is emitted as soon as it is complete,
+        so only about one chunk of text is buffered at a time. Because the
+        total is unknown while streaming, chunk metadata carries
+        ``chunk_index`` and ``chunk_size`` but not ``total_chunks``.
+
+        Args:
+            text_iter: Iterable of text pieces, in document order
+            metadata: Optional metadata to attach to each chunk
+
+        Yields:
+            Dictionaries containing chunk text and metadata
+        """
+        base = metadata or {}
+
+        if self.mode == 'token':
+            # Token windows need the full token sequence; chunk it in one go
+            chunks = self._split_texts(["\n\n".join(text_iter)])[0]
+            for idx, chunk in enumerate(chunks):
+                yield {
+                    'text': chunk,
+                    'metadata': {**base, 'chunk_index': idx, 'chunk_size': len(chunk)},
+                }
+            return
+
+        idx = 0
+        buffer = ""
+
+        def emit(spans):
+            nonlocal idx
+            for start, end in spans:
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield {
+                        'text': chunk,
+                        'metadata': {**base, 'chunk_index': idx, 'chunk_size': len(chunk)},
+                    }
+                    idx += 1
+
+        for piece in text_iter:
+            buffer = f"{buffer}\n\n{piece}" if buffer else piece
+            if len(buffer) <= self.chunk_size:
+                continue
+
+            # Every chunk but the last ended before the buffer did, so it is
+            # final; the last one may still grow when the next piece arrives
+            spans = self._split_spans(buffer)
+            yield from emit(spans[:-1])
+            buffer = buffer[spans[-1][0]:]
+
+        if buffer:
+            yield from emit(self._split_spans(buffer))
+
     def chunk_documents(
         self,
         documents: List[dict],
@@ -129,15 +565,20 @@ class DocumentChunker:
         """
         all_chunks = []
 
-        for doc_idx, doc in enumerate(documents):
-            text = doc.get(text_key, '')
+        # Split every document up front so token mode can batch the tokenizer
+        split_texts = self._split_texts([doc.get(text_key, '') for doc in documents])
+
+        for doc_idx, (doc, chunks) in enumerate(zip(documents, split_texts)):
             metadata = doc.get('metadata', {})
             metadata['document_index'] = doc_idx
 
-            chunks = self.chunk_text(text, metadata)
-            all_chunks.extend(chunks)
+            if not chunks:
+                logger.warning(f"Document {doc_idx} produced no chunks")
+                continue
+
+            all_chunks.extend(self._attach_metadata(chunks, metadata))
 
-        logger.info(f"Chunked {len(documents)} documents into {len(all_chunks)} chunks")
+        logger.info("Chunked %d documents into %d chunks", len(documents), len(all_chunks))
         return all_chunks
 
     def get_chunk_stats(self, chunks: List[dict]) -> dict:
@@ -150,15 +591,4 @@ class DocumentChunker:
         Returns:
             Dictionary with chunk statistics
         """
-        if not chunks:
-            return {'total_chunks': 0}
-
-        chunk_sizes = [len(chunk['text']) for chunk in chunks]
-
-        return {
-            'total_chunks': len(chunks),
-            'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes),
-            'min_chunk_size': min(chunk_sizes),
-            'max_chunk_size': max(chunk_sizes),
-            'total_characters': sum(chunk_sizes),
-        }
+        return chunk_stats(chunks)
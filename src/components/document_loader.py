@@ -2,27 +2,173 @@
 Document loader for processing PDF files.
 """
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from pypdf import PdfReader
+from typing import Iterator, List, Optional, Tuple, Union
+import pymupdf
 
 logger = logging.getLogger(__name__)
 
+# Workers are forked from a clean server process instead of this one, which
+# may be running threads (Numba, Streamlit) that a fork would copy mid-flight
+PROCESS_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# A PDF source is either a path on disk or the raw file bytes
+PdfSource = Union[str, bytes, memoryview]
+
+# (page text, error message) for a single page
+PageResult = Tuple[str, Optional[str]]
+
+# Files up to this size are read into memory in one call before parsing
+_PREFETCH_LIMIT = 200 * 1024 * 1024
+
+
+def _open_pdf(source: PdfSource) -> pymupdf.Document:
+    """Open a PDF from a file path or raw bytes."""
+    if isinstance(source, (bytes, memoryview)):
+        return pymupdf.open(stream=source, filetype="pdf")
+    return pymupdf.open(source)
+
+
+def _page_texts(doc: pymupdf.Document, start: int, stop: int) -> Iterator[PageResult]:
+    """Lazily extract text from pages [start, stop) of an open document."""
+    for i in range(start, stop):
+        try:
+            page = doc.load_page(i)
+
+            # A page without font resources, annotations or form fields cannot
+            # contain text, so skip parsing its content stream; this is typical
+            # of scanned pages and diagrams, which are also the slowest to parse.
+            # The font list omits fonts used only by annotations and widgets.
+            if not (page.get_fonts() or page.first_annot or page.first_widget):
+                yield "", None
+                continue
+
+            yield page.get_text(), None
+        except Exception as e:
+            yield "", str(e)
+
+
+def _extract_page_range(source: PdfSource, start: int, stop: int) -> List[PageResult]:
+    """
+    Extract text from pages [start, stop) in a worker process.
+
+    PyMuPDF documents cannot be shared across threads or processes, so each
+    worker reopens the source itself.
+    """
+    doc = _open_pdf(source)
+    try:
+        return list(_page_texts(doc, start, stop))
+    finally:
+        doc.close()
+
 
 class DocumentLoader:
     """Loads and extracts text from PDF documents."""
 
-    def __init__(self):
+    def __init__(self, parallel: bool = False, max_workers: Optional[int] = None):
+        """
+        Initialize the document loader.
+
+        Args:
+            parallel: Extract pages in a process pool for large PDFs
+            max_workers: Number of worker processes (defaults to CPU count)
+        """
         self.supported_extensions = ['.pdf']
+        self.parallel = parallel
+        self.max_workers = max_workers or os.cpu_count() or 1
 
-    def load_pdf(self, file_path: str) -> str:
+    def _extract_pages(self, doc: pymupdf.Document, source: PdfSource) -> Iterator[PageResult]:
         """
-        Load text content from a PDF file.
+        Extract text from every page of an open document, in page order.
+
+        Pages are split into one contiguous range per worker when parallel
+        extraction is enabled and the document has more than one page.
+        """
+        page_count = doc.page_count
+        workers = min(self.max_workers, page_count)
+
+        if not self.parallel or workers < 2:
+            yield from _page_texts(doc, 0, page_count)
+            return
+
+        # Buffer views cannot be pickled for the workers
+        if isinstance(source, memoryview):
+            source = source.tobytes()
+
+        step = -(-page_count // workers)
+        bounds = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+        with ProcessPoolExecutor(max_workers=len(bounds), mp_context=PROCESS_CONTEXT) as executor:
+            ranges = executor.map(
+                _extract_page_range,
+                [source] * len(bounds),
+                [start for start, _ in bounds],
+                [stop for _, stop in bounds],
+            )
+            for page_range in ranges:
+                yield from page_range
+
+    def _iter_source_pages(self, source: PdfSource, name: str) -> Iterator[str]:
+        """Yield the non-empty text of each page of a PDF, keeping it open meanwhile."""
+        doc = _open_pdf(source)
+        try:
+            empty_pages = 0
+            for page_num, (text, error) in enumerate(self._extract_pages(doc, source), start=1):
+                if error:
+                    logger.error(f"Error extracting text from page {page_num}: {error}")
+                elif text.strip():
+                    yield text
+                else:
+                    empty_pages += 1
+
+            # One summary line per document, not one per page of a scanned PDF
+            if empty_pages:
+                logger.warning(
+                    "%d of %d pages in %s contain no text", empty_pages, doc.page_count, name
+                )
+            logger.info("Successfully loaded %d pages from %s", doc.page_count, name)
+        finally:
+            doc.close()
+
+    def _prefetch(self, path: Path) -> PdfSource:
+        """
+        Get a PDF into memory ahead of parsing.
+
+        Parsing issues many small reads while chasing the xref table and
+        object streams. Small files are read in one sequential call and
+        parsed from memory. Larger files, and files handed to worker
+        processes, are parsed from disk after asking the OS to read them
+        ahead.
+        """
+        if not self.parallel and path.stat().st_size <= _PREFETCH_LIMIT:
+            return path.read_bytes()
+
+        if hasattr(os, 'posix_fadvise'):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+
+        return str(path)
+
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """
+        Lazily yield the text of each page of a PDF file.
+
+        Pages are extracted as the iterator is consumed, so the whole document
+        never has to be held in memory at once.
 
         Args:
             file_path: Path to the PDF file
 
         Returns:
-            Extracted text content from all pages
+            Iterator over the non-empty page texts
 
         Raises:
             FileNotFoundError: If the file doesn't exist
@@ -39,26 +185,46 @@ class DocumentLoader:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
+        return self._iter_source_pages(self._prefetch(path), path.name)
+
+    def iter_pages_from_bytes(
+        self,
+        file_bytes: Union[bytes, memoryview],
+        filename: str,
+    ) -> Iterator[str]:
+        """
+        Lazily yield the text of each page of a PDF held in memory.
+
+        Args:
+            file_bytes: PDF file content as bytes or a buffer view of them
+            filename: Original filename for logging
+
+        Returns:
+            Iterator over the non-empty page texts
+        """
+        return self._iter_source_pages(file_bytes, filename)
+
+    def load_pdf(self, file_path: str) -> str:
+        """
+        Load text content from a PDF file.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Returns:
+            Extracted text content from all pages
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a supported format
+        """
+        pages = self.iter_pages(file_path)
+
         try:
-            reader = PdfReader(file_path)
-            text_content = []
-
-            for page_num, page in enumerate(reader.pages, start=1):
-                try:
-                    text = page.extract_text()
-                    if text.strip():
-                        text_content.append(text)
-                    else:
-                        logger.warning(f"Page {page_num} contains no text")
-                except Exception as e:
-                    logger.error(f"Error extracting text from page {page_num}: {e}")
-                    continue
-
-            if not text_content:
-                raise ValueError(f"No text could be extracted from {file_path}")
+            full_text = "\n\n".join(pages)
 
-            full_text = "\n\n".join(text_content)
-            logger.info(f"Successfully loaded {len(reader.pages)} pages from {path.name}")
+            if not full_text:
+                raise ValueError(f"No text could be extracted from {file_path}")
 
             return full_text
 
@@ -66,38 +232,22 @@ class DocumentLoader:
             logger.error(f"Error loading PDF: {e}")
             raise
 
-    def load_from_bytes(self, file_bytes: bytes, filename: str) -> str:
+    def load_from_bytes(self, file_bytes: Union[bytes, memoryview], filename: str) -> str:
         """
         Load text content from PDF file bytes (for Streamlit upload).
 
         Args:
-            file_bytes: PDF file content as bytes
+            file_bytes: PDF file content as bytes or a buffer view of them
             filename: Original filename for logging
 
         Returns:
             Extracted text content from all pages
         """
         try:
-            from io import BytesIO
-
-            pdf_file = BytesIO(file_bytes)
-            reader = PdfReader(pdf_file)
-            text_content = []
-
-            for page_num, page in enumerate(reader.pages, start=1):
-                try:
-                    text = page.extract_text()
-                    if text.strip():
-                        text_content.append(text)
-                except Exception as e:
-                    logger.error(f"Error extracting text from page {page_num}: {e}")
-                    continue
-
-            if not text_content:
-                raise ValueError(f"No text could be extracted from {filename}")
+            full_text = "\n\n".join(self.iter_pages_from_bytes(file_bytes, filename))
 
-            full_text = "\n\n".join(text_content)
-            logger.info(f"Successfully loaded {len(reader.pages)} pages from {filename}")
+            if not full_text:
+                raise ValueError(f"No text could be extracted from {filename}")
 
             return full_text
 
@@ -116,21 +266,25 @@ class DocumentLoader:
             Dictionary containing PDF metadata
         """
         try:
-            reader = PdfReader(file_path)
-            metadata = {
-                'num_pages': len(reader.pages),
-                'file_name': Path(file_path).name,
-            }
-
-            if reader.metadata:
-                metadata.update({
-                    'title': reader.metadata.get('/Title', 'Unknown'),
-                    'author': reader.metadata.get('/Author', 'Unknown'),
-                    'subject': reader.metadata.get('/Subject', 'Unknown'),
-                    'creator': reader.metadata.get('/Creator', 'Unknown'),
-                })
-
-            return metadata
+            doc = _open_pdf(file_path)
+            try:
+                metadata = {
+                    'num_pages': doc.page_count,
+                    'file_name': Path(file_path).name,
+                }
+
+                if doc.metadata:
+                    # PyMuPDF reports missing fields as empty strings
+                    metadata.update({
+                        'title': doc.metadata.get('title') or 'Unknown',
+                        'author': doc.metadata.get('author') or 'Unknown',
+                        'subject': doc.metadata.get('subject') or 'Unknown',
+                        'creator': doc.metadata.get('creator') or 'Unknown',
+                    })
+
+                return metadata
+            finally:
+                doc.close()
 
         except Exception as e:
             logger.error(f"Error extracting metadata: {e}")
@@ -1,14 +1,24 @@
 """
 Embeddings and vector store management using ChromaDB.
 """
+import hashlib
 import logging
 import os
 from typing import List, Optional
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 
 logger = logging.getLogger(__name__)
 
+# Metadata value types ChromaDB stores natively; anything else is stringified
+_SCALAR_TYPES = (str, int, float, bool)
+
+
+def chunk_id(text: str) -> str:
+    """Content-derived id for a chunk, so identical text maps to the same id."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 
 class VectorStore:
     """Manages document embeddings and vector similarity search."""
@@ -18,6 +28,12 @@ class VectorStore:
         collection_name: str = "documents",
         persist_directory: Optional[str] = None,
         embedding_function: Optional[any] = None,
+        embedding_device: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        hnsw_m: int = 32,
+        hnsw_construction_ef: int = 200,
+        hnsw_search_ef: int = 64,
+        hnsw_num_threads: Optional[int] = None,
     ):
         """
         Initialize the vector store.
@@ -25,12 +41,36 @@ class VectorStore:
         Args:
             collection_name: Name of the ChromaDB collection
             persist_directory: Directory to persist the database
-            embedding_function: Custom embedding function (uses default if None)
+            embedding_function: Custom embedding function (uses ChromaDB's
+                default embedder if None)
+            embedding_device: Device for a sentence-transformers embedder, e.g.
+                'cuda' (uses ChromaDB's default embedder if None)
+            batch_size: Default number of chunks embedded per add call
+            hnsw_m: Maximum neighbours per node in the HNSW graph
+            hnsw_construction_ef: Candidate list size while building the index
+            hnsw_search_ef: Candidate list size while searching
+            hnsw_num_threads: Threads used for index operations (defaults to CPU count)
+
+        Note:
+            HNSW parameters and the embedder are fixed when the collection is
+            created; ChromaDB refuses to reopen a collection with a different
+            embedding function. Call clear_collection() to rebuild an existing
+            collection with new values.
         """
         self.collection_name = collection_name
         self.persist_directory = persist_directory or os.getenv(
             'CHROMA_PERSIST_DIRECTORY', './chroma_db'
         )
+        self.embedding_device = embedding_device or os.getenv('EMBEDDING_DEVICE')
+        self.batch_size = batch_size or int(os.getenv('EMBEDDING_BATCH_SIZE', '256'))
+        self.embedding_function = embedding_function or self._device_embedding_function()
+        self.hnsw_params = {
+            "hnsw:space": "cosine",  # Use cosine similarity
+            "hnsw:M": hnsw_m,
+            "hnsw:construction_ef": hnsw_construction_ef,
+            "hnsw:search_ef": hnsw_search_ef,
+            "hnsw:num_threads": hnsw_num_threads or os.cpu_count() or 1,
+        }
 
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -39,17 +79,49 @@ class VectorStore:
         )
 
         # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
-        )
+        self.collection = self._get_or_create_collection()
+
+        # Bumped on every write so callers can invalidate cached search results
+        self.version = 0
 
         logger.info(f"Initialized vector store: {self.collection_name}")
 
+    def _device_embedding_function(self):
+        """
+        Build a sentence-transformers embedder when an embedding device is set.
+
+        Returns None otherwise, so ChromaDB applies its default embedder.
+        """
+        if self.embedding_device:
+            model_kwargs = {}
+            if self.embedding_device.startswith('cuda'):
+                # Half precision halves memory traffic on GPU with no recall impact
+                model_kwargs['torch_dtype'] = 'float16'
+            return embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name='all-MiniLM-L6-v2',
+                device=self.embedding_device,
+                normalize_embeddings=True,
+                model_kwargs=model_kwargs,
+            )
+
+        return None
+
+    def _get_or_create_collection(self):
+        """Get or create the collection with this store's embedding settings."""
+        kwargs = {}
+        if self.embedding_function is not None:
+            kwargs['embedding_function'] = self.embedding_function
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata=self.hnsw_params,
+            **kwargs,
+        )
+
     def add_documents(
         self,
         chunks: List[dict],
         text_key: str = 'text',
+        batch_size: Optional[int] = None,
     ) -> int:
         """
         Add document chunks to the vector store.
@@ -57,35 +129,62 @@ class VectorStore:
         Args:
             chunks: List of chunk dictionaries containing text and metadata
             text_key: Key in chunk dict that contains the text
+            batch_size: Number of chunks submitted to ChromaDB per call
+                (defaults to the store's batch_size)
 
         Returns:
-            Number of documents added
+            Number of new documents added; chunks whose text is already
+            stored (or repeated within ``chunks``) are skipped
         """
         if not chunks:
             logger.warning("No chunks provided to add")
             return 0
 
         try:
-            # Prepare data for ChromaDB
-            ids = [f"chunk_{i}" for i in range(len(chunks))]
-            documents = [chunk[text_key] for chunk in chunks]
-            metadatas = [chunk.get('metadata', {}) for chunk in chunks]
-
-            # Convert non-string metadata values to strings
-            for metadata in metadatas:
-                for key, value in metadata.items():
-                    if not isinstance(value, (str, int, float, bool)):
-                        metadata[key] = str(value)
-
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
+            # Prepare data for ChromaDB, keeping the first chunk for each text
+            unique_chunks = {}
+            for chunk in chunks:
+                unique_chunks.setdefault(chunk_id(chunk[text_key]), chunk)
+
+            ids = list(unique_chunks)
+            documents = [chunk[text_key] for chunk in unique_chunks.values()]
 
-            logger.info(f"Added {len(chunks)} documents to vector store")
-            return len(chunks)
+            # Convert non-scalar metadata values to strings; ChromaDB rejects
+            # empty metadata dicts, so chunks without metadata get None
+            metadatas = [
+                {
+                    key: value if isinstance(value, _SCALAR_TYPES) else str(value)
+                    for key, value in (chunk.get('metadata') or {}).items()
+                } or None
+                for chunk in unique_chunks.values()
+            ]
+
+            # Add to collection in fixed-size batches to cap peak memory
+            batch_size = batch_size or self.batch_size
+            added = 0
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+
+                # Skip chunks already in the collection so they are not re-embedded
+                existing = set(self.collection.get(ids=ids[start:end], include=[])['ids'])
+                new = [i for i in range(start, min(end, len(ids))) if ids[i] not in existing]
+                if not new:
+                    continue
+
+                self.collection.upsert(
+                    ids=[ids[i] for i in new],
+                    documents=[documents[i] for i in new],
+                    metadatas=[metadatas[i] for i in new]
+                )
+                added += len(new)
+
+            if added:
+                self.version += 1
+            logger.info(
+                "Added %d documents to vector store (%d duplicates skipped)",
+                added, len(chunks) - added,
+            )
+            return added
 
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {e}")
@@ -108,26 +207,54 @@ class VectorStore:
         Returns:
             List of dictionaries containing results with text, metadata, and scores
         """
+        return self.search_batch([query], top_k=top_k, filter_metadata=filter_metadata)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 4,
+        filter_metadata: Optional[dict] = None,
+    ) -> List[List[dict]]:
+        """
+        Search for several queries in a single ChromaDB call.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filters applied to every query
+
+        Returns:
+            One list of results per query, in the same order as ``queries``
+        """
+        if not queries:
+            return []
+
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_texts=queries,
                 n_results=top_k,
                 where=filter_metadata,
             )
 
             # Format results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
+            formatted_batches = []
+            for qi in range(len(queries)):
+                documents = results['documents'][qi] if results['documents'] else []
+                formatted_results = []
+                for i in range(len(documents)):
                     formatted_results.append({
-                        'text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                        'distance': results['distances'][0][i] if results['distances'] else None,
-                        'id': results['ids'][0][i] if results['ids'] else None,
+                        'text': documents[i],
+                        'metadata': results['metadatas'][qi][i] if results['metadatas'] else {},
+                        'distance': results['distances'][qi][i] if results['distances'] else None,
+                        'id': results['ids'][qi][i] if results['ids'] else None,
                     })
+                formatted_batches.append(formatted_results)
 
-            logger.info(f"Retrieved {len(formatted_results)} results for query")
-            return formatted_results
+            logger.info(
+                "Retrieved %d results for %d queries",
+                sum(len(r) for r in formatted_batches), len(queries),
+            )
+            return formatted_batches
 
         except Exception as e:
             logger.error(f"Error searching vector store: {e}")
@@ -140,11 +267,9 @@ class VectorStore:
             self.client.delete_collection(name=self.collection_name)
 
             # Recreate it
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
+            self.collection = self._get_or_create_collection()
 
+            self.version += 1
             logger.info(f"Cleared collection: {self.collection_name}")
 
         except Exception as e:
@@ -173,6 +298,7 @@ class VectorStore:
         """Permanently delete the collection."""
         try:
             self.client.delete_collection(name=self.collection_name)
+            self.version += 1
             logger.info(f"Deleted collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error deleting collection: {e}")
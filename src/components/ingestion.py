@@ -0,0 +1,231 @@
+"""
+Parsing and chunking of uploaded documents across worker processes.
+"""
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from src.components.chunking import DocumentChunker, resolve_chunk_settings
+from src.components.document_loader import PROCESS_CONTEXT, DocumentLoader
+
+logger = logging.getLogger(__name__)
+
+# Part of every chunk cache key; bump it whenever text extraction or
+# splitting changes so chunks made by older code are not served
+_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def _get_loader() -> DocumentLoader:
+    """Loader shared by every file parsed in this process."""
+    return DocumentLoader()
+
+
+@lru_cache(maxsize=8)
+def _get_chunker(chunk_size: int, chunk_overlap: int, mode: str) -> DocumentChunker:
+    """Chunker shared by every file chunked in this process with these settings."""
+    return DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, mode=mode)
+
+
+@lru_cache(maxsize=None)
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Worker pool kept for the life of the process.
+
+    Starting workers and loading the compiled chunking kernels in each one
+    costs far more than parsing a few small PDFs, so uploads share one pool
+    instead of starting their own.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=PROCESS_CONTEXT)
+
+
+def parse_and_chunk(
+    file_bytes: Union[bytes, memoryview],
+    filename: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[dict]:
+    """
+    Extract text from a PDF and split it into chunks tagged with its filename.
+
+    Pages are chunked as they are extracted, so the document's full text is
+    never joined into one string.
+
+    Args:
+        file_bytes: PDF file content as bytes or a buffer view of them
+        filename: Original filename, stored in each chunk's metadata
+        chunk_size: Chunk size passed to DocumentChunker
+        chunk_overlap: Chunk overlap passed to DocumentChunker
+        mode: Chunking mode passed to DocumentChunker
+
+    Returns:
+        List of chunk dictionaries
+
+    Raises:
+        ValueError: If no text could be extracted from the PDF
+    """
+    chunker = _get_chunker(*resolve_chunk_settings(chunk_size, chunk_overlap, mode))
+    pages = _get_loader().iter_pages_from_bytes(file_bytes, filename)
+    chunks = list(chunker.chunk_stream(pages, {'filename': filename}))
+
+    if not chunks:
+        raise ValueError(f"No text could be extracted from {filename}")
+
+    for chunk in chunks:
+        chunk['metadata']['total_chunks'] = len(chunks)
+    return chunks
+
+
+def parse_and_chunk_files(
+    files: List[Tuple[Union[bytes, memoryview], str]],
+    max_workers: int = 8,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    mode: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> List[Union[List[dict], Exception]]:
+    """
+    Parse and chunk several PDFs concurrently.
+
+    PyMuPDF must not be used from multiple threads, so files are processed in
+    separate worker processes. A single file is processed inline to avoid the
+    pool start-up cost.
+
+    Chunks are cached on disk as JSON, keyed by the SHA-256 of the file
+    content and the chunking settings, so re-uploading a file skips parsing
+    and chunking entirely.
+
+    Args:
+        files: (file bytes, filename) pairs; buffer views avoid a copy when a
+            single file is processed inline
+        max_workers: Upper bound on worker processes
+        chunk_size: Chunk size passed to DocumentChunker
+        chunk_overlap: Chunk overlap passed to DocumentChunker
+        mode: Chunking mode passed to DocumentChunker
+        cache_dir: Directory for cached chunks (defaults to the
+            CHUNK_CACHE_DIR env var; an empty value disables the cache)
+
+    Returns:
+        One entry per file, in input order: its chunks, or the exception
+        raised while processing it
+    """
+    # Resolve the settings here so workers use exactly those in the cache key
+    settings = resolve_chunk_settings(chunk_size, chunk_overlap, mode)
+    if cache_dir is None:
+        cache_dir = os.getenv('CHUNK_CACHE_DIR', './.cache/chunks')
+
+    if not cache_dir:
+        return _parse_and_chunk_all(files, max_workers, settings)
+
+    paths = [_cache_path(cache_dir, file_bytes, settings) for file_bytes, _ in files]
+    results = [_read_cache(path, filename) for path, (_, filename) in zip(paths, files)]
+
+    misses = [i for i, chunks in enumerate(results) if chunks is None]
+    if misses:
+        parsed = _parse_and_chunk_all([files[i] for i in misses], max_workers, settings)
+        for i, chunks in zip(misses, parsed):
+            results[i] = chunks
+            if not isinstance(chunks, Exception):
+                _write_cache(paths[i], chunks)
+
+    return results
+
+
+def _parse_and_chunk_all(
+    files: List[Tuple[Union[bytes, memoryview], str]],
+    max_workers: int,
+    settings: Tuple[int, int, str],
+) -> List[Union[List[dict], Exception]]:
+    """Parse and chunk every file, inline for one file or in worker processes."""
+    if len(files) <= 1:
+        results = []
+        for file_bytes, filename in files:
+            try:
+                results.append(parse_and_chunk(file_bytes, filename, *settings))
+            except Exception as e:
+                logger.error(f"Error processing {filename}: {e}")
+                results.append(e)
+        return results
+
+    try:
+        futures = _submit_all(_get_pool(max_workers), files, settings)
+    except BrokenProcessPool:
+        # A worker died during an earlier batch; replace the pool
+        _get_pool.cache_clear()
+        futures = _submit_all(_get_pool(max_workers), files, settings)
+
+    results = []
+    for future, (_, filename) in zip(futures, files):
+        error = future.exception()
+        if error:
+            logger.error(f"Error processing {filename}: {error}")
+            results.append(error)
+        else:
+            results.append(future.result())
+    return results
+
+
+def _submit_all(
+    pool: ProcessPoolExecutor,
+    files: List[Tuple[Union[bytes, memoryview], str]],
+    settings: Tuple[int, int, str],
+) -> List[Future]:
+    """Submit every file to the pool for parsing and chunking."""
+    # Buffer views cannot be pickled to the workers, so those files are copied
+    return [
+        pool.submit(parse_and_chunk, bytes(file_bytes), filename, *settings)
+        for file_bytes, filename in files
+    ]
+
+
+def _cache_path(
+    cache_dir: str,
+    file_bytes: Union[bytes, memoryview],
+    settings: Tuple[int, int, str],
+) -> Path:
+    """Cache file for a PDF's chunks under the given (size, overlap, mode) settings."""
+    chunk_size, chunk_overlap, mode = settings
+    digest = hashlib.sha256(file_bytes)
+    digest.update(f"{_CACHE_VERSION}:{mode}:{chunk_size}:{chunk_overlap}".encode())
+    return Path(cache_dir) / f"{digest.hexdigest()}.json"
+
+
+def _read_cache(path: Path, filename: str) -> Optional[List[dict]]:
+    """
+    Load cached chunks, tagged with ``filename``.
+
+    Returns:
+        The chunks, or None when they are not cached or cannot be read
+    """
+    try:
+        chunks = json.loads(path.read_bytes())
+        # The same content may have been uploaded under another name
+        for chunk in chunks:
+            chunk['metadata']['filename'] = filename
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable chunk cache {path}: {e}")
+        return None
+
+    logger.info("Loaded %d cached chunks for %s", len(chunks), filename)
+    return chunks
+
+
+def _write_cache(path: Path, chunks: List[dict]):
+    """Store chunks in the cache; failures are logged, not raised."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(chunks), encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write chunk cache {path}: {e}")
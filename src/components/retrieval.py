@@ -3,11 +3,16 @@ RAG chain implementation combining retrieval and generation.
 """
 import logging
 import os
-from typing import List, Optional
+from collections import OrderedDict
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence
 from anthropic import Anthropic
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of characters of a source shown as its snippet
+SNIPPET_LENGTH = 500
+
 
 class RAGPipeline:
     """Retrieval-Augmented Generation pipeline using Claude."""
@@ -18,6 +23,7 @@ class RAGPipeline:
         api_key: Optional[str] = None,
         model: Optional[str] = None,
         top_k: int = 4,
+        cache_size: int = 512,
     ):
         """
         Initialize the RAG pipeline.
@@ -27,9 +33,14 @@ class RAGPipeline:
             api_key: Anthropic API key (uses env var if not provided)
             model: Claude model to use
             top_k: Number of documents to retrieve
+            cache_size: Maximum number of cached retrievals (0 disables caching)
         """
         self.vector_store = vector_store
         self.top_k = top_k
+        self.cache_size = cache_size
+
+        # LRU cache of search results keyed by (normalized query, top_k, store version)
+        self._search_cache: OrderedDict = OrderedDict()
 
         self.model = model or os.getenv('CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
 
@@ -52,28 +63,91 @@ class RAGPipeline:
         Returns:
             Tuple of (retrieved documents, formatted context string)
         """
-        # Retrieve relevant chunks
-        results = self.vector_store.search(query, top_k=self.top_k)
+        return self.retrieve_context_batch([query])[0]
 
-        if not results:
-            return [], ""
+    def retrieve_context_batch(self, queries: List[str]) -> List[tuple[List[dict], str]]:
+        """
+        Retrieve relevant context for several queries with one vector store call.
 
-        # Format context for the prompt
-        context_parts = []
-        for i, result in enumerate(results, 1):
-            context_parts.append(f"[Document {i}]\n{result['text']}")
+        Args:
+            queries: User questions
 
-        context = "\n\n".join(context_parts)
-        return results, context
+        Returns:
+            One (retrieved documents, formatted context string) tuple per query
+        """
+        contexts = []
+        for results in self._search(queries):
+            if not results:
+                contexts.append(([], ""))
+                continue
 
-    def generate_answer(
+            # Format context for the prompt
+            context_parts = []
+            for i, result in enumerate(results, 1):
+                context_parts.append(f"[Document {i}]\n{result['text']}")
+
+            contexts.append((results, "\n\n".join(context_parts)))
+
+        return contexts
+
+    def _search(self, queries: List[str]) -> List[List[dict]]:
+        """
+        Search the vector store, serving repeated queries from the LRU cache.
+
+        Cache misses are still sent to the vector store in a single batch.
+        """
+        version = getattr(self.vector_store, 'version', 0)
+        keys = [(query.strip().lower(), self.top_k, version) for query in queries]
+
+        misses = [key for key in dict.fromkeys(keys) if key not in self._search_cache]
+        if misses:
+            fetched = self.vector_store.search_batch(
+                [queries[keys.index(key)] for key in misses], top_k=self.top_k
+            )
+            for key, results in zip(misses, fetched):
+                self._search_cache[key] = results
+
+        results = []
+        for key in keys:
+            results.append(self._search_cache[key])
+            self._search_cache.move_to_end(key)
+
+        while len(self._search_cache) > self.cache_size:
+            self._search_cache.popitem(last=False)
+
+        return results
+
+    @staticmethod
+    def _format_sources(source_docs: List[dict]) -> List[dict]:
+        """
+        Add the display fields the UI renders to each retrieved document.
+
+        Returns new dictionaries so cached search results are left untouched.
+        """
+        sources = []
+        for doc in source_docs:
+            text = doc['text']
+            metadata = doc.get('metadata') or {}
+            sources.append({
+                **doc,
+                'relevance': 1 - (doc.get('distance') or 0),
+                'snippet': (
+                    text[:SNIPPET_LENGTH] + "..." if len(text) > SNIPPET_LENGTH else text
+                ),
+                'filename': metadata.get('filename', 'Unknown'),
+                'chunk_index': metadata.get('chunk_index', 'N/A'),
+                'total_chunks': metadata.get('total_chunks', 'N/A'),
+            })
+        return sources
+
+    def _build_prompt(
         self,
         query: str,
         context: str,
         system_prompt: Optional[str] = None,
-    ) -> str:
+    ) -> tuple[str, str]:
         """
-        Generate an answer using Claude based on retrieved context.
+        Build the system prompt and user message for a question.
 
         Args:
             query: User question
@@ -81,7 +155,7 @@ class RAGPipeline:
             system_prompt: Optional custom system prompt
 
         Returns:
-            Generated answer
+            Tuple of (system prompt, user message)
         """
         if not system_prompt:
             system_prompt = (
@@ -105,82 +179,248 @@ Question: {query}
 
 Please provide a clear, accurate answer based on the context above."""
 
+        return system_prompt, user_message
+
+    def generate_answer(
+        self,
+        query: str,
+        context: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[dict]] = None,
+    ) -> str:
+        """
+        Generate an answer using Claude based on retrieved context.
+
+        Args:
+            query: User question
+            context: Retrieved context documents
+            system_prompt: Optional custom system prompt
+            history: Optional prior conversation as Claude messages
+
+        Returns:
+            Generated answer
+        """
+        system_prompt, user_message = self._build_prompt(query, context, system_prompt)
+
         try:
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=2048,
                 system=system_prompt,
-                messages=[
+                messages=(history or []) + [
                     {"role": "user", "content": user_message}
                 ]
             )
 
             answer = response.content[0].text
-            logger.info(f"Generated answer for query: {query[:50]}...")
+            logger.info("Generated answer for query: %.50s...", query)
             return answer
 
         except Exception as e:
             logger.error(f"Error generating answer: {e}")
             raise
 
-    def query(self, question: str) -> dict:
+    def generate_answer_stream(
+        self,
+        query: str,
+        context: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[dict]] = None,
+    ) -> Iterator[str]:
+        """
+        Generate an answer using Claude, yielding text as it is produced.
+
+        Args:
+            query: User question
+            context: Retrieved context documents
+            system_prompt: Optional custom system prompt
+            history: Optional prior conversation as Claude messages
+
+        Yields:
+            Fragments of the generated answer
+        """
+        system_prompt, user_message = self._build_prompt(query, context, system_prompt)
+
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=2048,
+                system=system_prompt,
+                messages=(history or []) + [
+                    {"role": "user", "content": user_message}
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+
+            logger.info("Streamed answer for query: %.50s...", query)
+
+        except Exception as e:
+            logger.error(f"Error generating answer: {e}")
+            raise
+
+    def _stream_answer(
+        self,
+        question: str,
+        context: str,
+        history: Optional[List[dict]],
+        result: dict,
+    ) -> Iterator[str]:
+        """
+        Stream an answer, reporting failures inline like query() does.
+
+        A failure is also recorded under 'error' in ``result``, as query()
+        does for failed non-streaming answers.
+        """
+        try:
+            yield from self.generate_answer_stream(question, context, history=history)
+        except Exception as e:
+            result['error'] = str(e)
+            yield f"\n\nError processing your question: {str(e)}"
+
+    def query(
+        self,
+        question: str,
+        stream: bool = False,
+        history: Optional[List[dict]] = None,
+    ) -> dict:
         """
         Complete RAG query: retrieve context and generate answer.
 
         Args:
             question: User question
+            stream: Return the answer as an iterator of text fragments under
+                'answer_stream' instead of a complete 'answer' string; if
+                generation fails, 'error' is set once the stream is consumed
+            history: Optional prior conversation as Claude messages
 
         Returns:
-            Dictionary with answer and source documents
+            Dictionary with answer and source documents; each source also
+            carries precomputed 'relevance', 'snippet', 'filename',
+            'chunk_index' and 'total_chunks' fields for display
         """
         try:
             # Retrieve relevant documents
             source_docs, context = self.retrieve_context(question)
+            return self._respond(question, source_docs, context, stream, history)
 
-            if not source_docs:
-                return {
-                    'answer': (
-                        "I don't have any documents to answer your "
-                        "question. Please upload documents first."
-                    ),
-                    'sources': [],
-                    'context': ""
-                }
+        except Exception as e:
+            logger.error(f"Error in RAG query: {e}")
+            return self._error_result(e)
 
-            # Generate answer
-            answer = self.generate_answer(question, context)
+    def query_batch(self, questions: List[str], stream: bool = False) -> List[dict]:
+        """
+        Answer several questions, retrieving context for all of them at once.
 
-            # Format response
-            return {
-                'answer': answer,
-                'sources': source_docs,
-                'context': context,
-                'num_sources': len(source_docs),
-            }
+        Retrieval for every question goes to the vector store in one batched
+        call; answers are then generated per question. With ``stream=True`` no
+        generation happens until a result's 'answer_stream' is consumed, so
+        this can cheaply prefetch results for questions that may be asked.
+
+        Args:
+            questions: User questions
+            stream: Return streaming results, as in query()
 
+        Returns:
+            One query() result per question, in the same order
+        """
+        try:
+            contexts = self.retrieve_context_batch(questions)
         except Exception as e:
             logger.error(f"Error in RAG query: {e}")
+            return [self._error_result(e) for _ in questions]
+
+        results = []
+        for question, (source_docs, context) in zip(questions, contexts):
+            try:
+                results.append(self._respond(question, source_docs, context, stream))
+            except Exception as e:
+                logger.error(f"Error in RAG query: {e}")
+                results.append(self._error_result(e))
+        return results
+
+    def _respond(
+        self,
+        question: str,
+        source_docs: List[dict],
+        context: str,
+        stream: bool = False,
+        history: Optional[List[dict]] = None,
+    ) -> dict:
+        """Build the query() result for a question whose context is already retrieved."""
+        if not source_docs:
             return {
-                'answer': f"Error processing your question: {str(e)}",
+                'answer': (
+                    "I don't have any documents to answer your "
+                    "question. Please upload documents first."
+                ),
                 'sources': [],
-                'error': str(e)
+                'context': ""
+            }
+
+        sources = self._format_sources(source_docs)
+
+        if stream:
+            result = {
+                'sources': sources,
+                'context': context,
+                'num_sources': len(sources),
             }
+            result['answer_stream'] = self._stream_answer(question, context, history, result)
+            return result
+
+        # Generate answer
+        answer = self.generate_answer(question, context, history=history)
+
+        # Format response
+        return {
+            'answer': answer,
+            'sources': sources,
+            'context': context,
+            'num_sources': len(sources),
+        }
+
+    @staticmethod
+    def _error_result(error: Exception) -> dict:
+        """Result returned in place of an answer when a query fails."""
+        return {
+            'answer': f"Error processing your question: {str(error)}",
+            'sources': [],
+            'error': str(error)
+        }
 
     def query_with_chat_history(
         self,
         question: str,
-        chat_history: List[dict],
+        chat_history: Sequence[dict],
+        max_turns: int = 4,
+        stream: bool = False,
     ) -> dict:
         """
-        Query with chat history context (for future implementation).
+        Query with the most recent conversation turns as context.
+
+        Prior turns are sent to Claude as earlier messages in the same request,
+        so follow-up questions are answered in one call rather than a separate
+        question-reformulation call followed by the answer call.
 
         Args:
             question: User question
-            chat_history: Previous conversation turns
+            chat_history: Previous turns as {'question': str, 'result': dict}
+                dictionaries, as returned by query(); a list or a deque
+            max_turns: Number of most recent turns to include
+            stream: Stream the answer, as in query()
 
         Returns:
             Dictionary with answer and sources
         """
-        # For now, just call regular query
-        # In future, we can reformulate the question based on chat history
-        return self.query(question)
+        history = []
+        first_turn = max(len(chat_history) - max(max_turns, 0), 0)
+        for turn in islice(chat_history, first_turn, None):
+            result = turn.get('result') or {}
+            # Skip failed turns and answers that never finished streaming
+            if 'error' in result or not result.get('answer'):
+                continue
+            history.append({"role": "user", "content": turn['question']})
+            history.append({"role": "assistant", "content": result['answer']})
+
+        return self.query(question, stream=stream, history=history)
@@ -2,30 +2,43 @@
 Streamlit UI for Enterprise Document Q&A System.
 """
 import streamlit as st
+import html
 import logging
-import sys
 import os
-from pathlib import Path
+from collections import OrderedDict, deque
+from itertools import islice
+import numpy as np
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Add parent directory to path to import components
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
-from src.components.document_loader import DocumentLoader  # noqa: E402
-from src.components.chunking import DocumentChunker  # noqa: E402
-from src.components.embeddings import VectorStore  # noqa: E402
-from src.components.retrieval import RAGPipeline  # noqa: E402
-
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+# ChromaDB logs every batch it writes; keep it quiet unless something goes wrong
+logging.getLogger('chromadb').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# Number of answered questions kept per session for instant repeats
+ANSWER_CACHE_SIZE = 256
+
+# Number of question/answer turns kept in a session's chat history
+CHAT_HISTORY_SIZE = 50
+
+# Maximum number of sources shown under an answer
+DISPLAY_SOURCES = 5
+
+# Sample question buttons, as label -> question
+SAMPLE_QUESTIONS = {
+    "📋 Summarize the main points": "Summarize the main points of this document",
+    "🔍 What are the key findings?": "What are the key findings or conclusions?",
+    "📊 What data is presented?": "What data or statistics are presented?",
+    "⚠️ Are there any risks mentioned?": "Are there any risks or limitations mentioned?",
+}
+
 # Page configuration
 st.set_page_config(
     page_title="Enterprise Document Q&A",
@@ -35,6 +48,46 @@ st.set_page_config(
 )
 
 
+@st.cache_resource
+def get_vector_store(collection_name: str):
+    """Vector store shared across reruns and sessions, built once per collection."""
+    from src.components.embeddings import VectorStore
+
+    return VectorStore(collection_name=collection_name)
+
+
+def _iter_batches(items, batch_size):
+    """Yield consecutive slices of ``items`` holding at most ``batch_size`` entries."""
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def _unseen_chunks(chunks):
+    """
+    Drop chunks whose text this session has already indexed, or that repeat
+    an earlier chunk in ``chunks``.
+
+    Returns:
+        Tuple of (new chunks, their content ids)
+    """
+    from src.components.embeddings import chunk_id
+
+    # Writes made elsewhere (another session, a clear) may have removed
+    # chunks, so the seen ids are only trusted while the store is unchanged
+    if st.session_state.seen_version != st.session_state.vector_store.version:
+        st.session_state.seen_hashes = set()
+
+    seen = st.session_state.seen_hashes
+    new_chunks = []
+    new_ids = set()
+    for chunk in chunks:
+        content_id = chunk_id(chunk['text'])
+        if content_id not in seen and content_id not in new_ids:
+            new_ids.add(content_id)
+            new_chunks.append(chunk)
+    return new_chunks, new_ids
+
+
 def initialize_session_state():
     """Initialize session state variables."""
     if 'vector_store' not in st.session_state:
@@ -42,15 +95,29 @@ def initialize_session_state():
     if 'rag_pipeline' not in st.session_state:
         st.session_state.rag_pipeline = None
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_SIZE)
+    if 'question_count' not in st.session_state:
+        # Questions asked so far; the bounded history cannot be used to number them
+        st.session_state.question_count = 0
     if 'documents_loaded' not in st.session_state:
         st.session_state.documents_loaded = False
     if 'doc_metadata' not in st.session_state:
         st.session_state.doc_metadata = []
+    if 'answer_cache' not in st.session_state:
+        st.session_state.answer_cache = OrderedDict()
+    if 'prewarmed_version' not in st.session_state:
+        st.session_state.prewarmed_version = None
+    if 'seen_hashes' not in st.session_state:
+        st.session_state.seen_hashes = set()
+        st.session_state.seen_version = None
 
 
 def initialize_components():
     """Initialize the RAG components."""
+    # Component modules pull in ChromaDB, PyMuPDF, Numba and the Anthropic
+    # client, so each is imported where it is first needed, not at startup
+    from src.components.retrieval import RAGPipeline
+
     try:
         # Check for API key
         if not os.getenv('ANTHROPIC_API_KEY'):
@@ -61,10 +128,7 @@ def initialize_components():
             st.stop()
 
         # Initialize vector store
-        if st.session_state.vector_store is None:
-            st.session_state.vector_store = VectorStore(
-                collection_name="doc_qa_collection"
-            )
+        st.session_state.vector_store = get_vector_store("doc_qa_collection")
 
         # Initialize RAG pipeline
         if st.session_state.rag_pipeline is None:
@@ -80,100 +144,232 @@ def initialize_components():
         st.stop()
 
 
-def process_uploaded_file(uploaded_file):
-    """Process and index an uploaded PDF file."""
-    try:
-        with st.spinner("📄 Processing document..."):
-            # Load document
-            loader = DocumentLoader()
-            text = loader.load_from_bytes(uploaded_file.read(), uploaded_file.name)
-
-            # Chunk document
-            chunker = DocumentChunker()
-            metadata = {'filename': uploaded_file.name}
-            chunks = chunker.chunk_text(text, metadata)
-
-            # Get chunk statistics
-            stats = chunker.get_chunk_stats(chunks)
+def process_uploaded_files(uploaded_files):
+    """Process uploaded PDF files and index their chunks in batches."""
+    from src.components.chunking import chunk_stats
+    from src.components.ingestion import parse_and_chunk_files
 
-            # Add to vector store
-            st.session_state.vector_store.add_documents(chunks)
+    try:
+        with st.spinner(f"📄 Processing {len(uploaded_files)} document(s)..."):
+            # Load and chunk all documents concurrently; Streamlit calls are
+            # only made here, after every worker has finished
+            files = [
+                (uploaded_file.getbuffer(), uploaded_file.name) for uploaded_file in uploaded_files
+            ]
+            # Chunk settings are read from the environment by the ingestion
+            # helpers, so the chunk cache key follows any configuration change
+            results = parse_and_chunk_files(files)
+
+            all_chunks = []
+            processed = []
+            for (_, filename), chunks in zip(files, results):
+                if isinstance(chunks, Exception):
+                    st.error(f"❌ Error processing {filename}: {chunks}")
+                    continue
+
+                all_chunks.extend(chunks)
+                processed.append((filename, chunk_stats(chunks)))
+
+            if not all_chunks:
+                return False
+
+            # Skip chunks this session has already indexed before they reach
+            # the vector store, which would otherwise look each one up
+            new_chunks, new_ids = _unseen_chunks(all_chunks)
+
+            # Add the new chunks to the vector store in fixed-size batches,
+            # reporting progress after each one
+            if new_chunks:
+                batch_size = int(os.getenv('VS_BATCH', '512'))
+                progress = st.progress(0.0, text="Indexing chunks...")
+                indexed = 0
+                for batch in _iter_batches(new_chunks, batch_size):
+                    st.session_state.vector_store.add_documents(batch)
+                    indexed += len(batch)
+                    progress.progress(
+                        indexed / len(new_chunks),
+                        text=f"Indexed {indexed} / {len(new_chunks)} chunks"
+                    )
+                progress.empty()
+
+            st.session_state.seen_hashes |= new_ids
+            st.session_state.seen_version = st.session_state.vector_store.version
 
             # Update session state
             st.session_state.documents_loaded = True
-            st.session_state.doc_metadata.append({
-                'filename': uploaded_file.name,
-                'chunks': stats['total_chunks'],
-                'size': stats['total_characters']
-            })
-
-            st.success(f"✅ Successfully processed {uploaded_file.name}")
+            for filename, stats in processed:
+                st.session_state.doc_metadata.append({
+                    'filename': filename,
+                    'chunks': stats['total_chunks'],
+                    'size': stats['total_characters']
+                })
+
+            stats = chunk_stats(all_chunks)
+            st.success(f"✅ Successfully processed {', '.join(name for name, _ in processed)}")
             st.info(
                 f"📊 Created {stats['total_chunks']} chunks "
-                f"(avg size: {int(stats['avg_chunk_size'])} chars)"
+                f"(avg size: {int(stats['avg_chunk_size'])} chars, "
+                f"{stats['total_chunks'] - len(new_chunks)} already indexed)"
             )
 
             return True
 
     except Exception as e:
-        st.error(f"❌ Error processing file: {e}")
+        st.error(f"❌ Error processing files: {e}")
         logger.error(f"File processing error: {e}")
         return False
 
 
+def get_answer(question):
+    """
+    Answer a question, reusing the result of an identical earlier question.
+
+    Streamlit reruns the script on every interaction, so the same question is
+    seen again and again. Results are kept per session, keyed by the
+    normalized question and the vector store version, so any change to the
+    indexed documents invalidates them.
+
+    A result whose answer still has to be streamed is not kept in the cache
+    until record_answer() is called after it has been displayed, so an
+    interrupted stream is never reused.
+
+    Returns:
+        Tuple of (result, whether it is new and should be recorded once shown)
+    """
+    cache = st.session_state.answer_cache
+    key = _answer_cache_key(question)
+
+    if key in cache:
+        if 'answer_stream' in cache[key]:
+            # A prefetched sample answer, streamed now for the first time
+            return cache.pop(key), True
+        cache.move_to_end(key)
+        return cache[key], False
+
+    return st.session_state.rag_pipeline.query(question, stream=True), True
+
+
+def record_answer(question, result):
+    """Add a fully displayed answer to the chat history and the answer cache."""
+    st.session_state.question_count += 1
+    st.session_state.chat_history.append({
+        'number': st.session_state.question_count,
+        'question': question,
+        'result': result
+    })
+    _cache_answer(_answer_cache_key(question), result)
+
+
+def _answer_cache_key(question):
+    """Answer cache key: the normalized question and the vector store version."""
+    return question.strip().lower(), st.session_state.vector_store.version
+
+
+def _cache_answer(key, result):
+    """Store a result in the session's answer cache, evicting the oldest entries."""
+    # Failed queries are retried next time instead of being cached
+    if 'error' in result:
+        return
+
+    cache = st.session_state.answer_cache
+    cache[key] = result
+    while len(cache) > ANSWER_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def prewarm_sample_answers():
+    """
+    Prefetch results for the sample questions once per vector store version.
+
+    The questions share one batched retrieval. Their answers are streamed
+    lazily, so nothing is generated until a sample question is asked.
+    """
+    version = st.session_state.vector_store.version
+    if st.session_state.prewarmed_version == version:
+        return
+
+    questions = list(SAMPLE_QUESTIONS.values())
+    results = st.session_state.rag_pipeline.query_batch(questions, stream=True)
+    for question, result in zip(questions, results):
+        key = _answer_cache_key(question)
+        if key not in st.session_state.answer_cache:
+            _cache_answer(key, result)
+    st.session_state.prewarmed_version = version
+
+
+def _top_sources(sources, k):
+    """
+    Pick the ``k`` most relevant sources, most relevant first.
+
+    Returns:
+        (document number, source) pairs; the number is the source's position
+        in the prompt, which is how the answer cites it
+    """
+    relevance = np.fromiter(
+        (source['relevance'] for source in sources), dtype=np.float64, count=len(sources)
+    )
+    if len(sources) > k:
+        order = np.argpartition(-relevance, k - 1)[:k]
+    else:
+        order = np.arange(len(sources))
+    order = order[np.argsort(-relevance[order], kind='stable')]
+    return [(int(i) + 1, sources[i]) for i in order]
+
+
 def display_answer(result):
     """Display the answer with sources."""
-    # Display answer
+    # Display answer, rendering it incrementally when it is still streaming
     st.markdown("### 💡 Answer")
-    st.markdown(result['answer'])
+    if 'answer_stream' in result:
+        result['answer'] = st.write_stream(result.pop('answer_stream'))
+    else:
+        st.markdown(result['answer'])
 
     # Display sources
     if result.get('sources'):
         st.markdown("---")
         st.markdown("### 📚 Sources")
 
-        for i, source in enumerate(result['sources'], 1):
-            relevance = 1 - source.get('distance', 0)
-            with st.expander(
-                f"Source {i} - Relevance Score: {relevance:.2%}"
-            ):
-                filename = source['metadata'].get('filename', 'Unknown')
-                st.markdown(f"**Filename:** {filename}")
-                chunk_idx = source['metadata'].get('chunk_index', 'N/A')
-                total = source['metadata'].get('total_chunks', 'N/A')
-                st.markdown(f"**Chunk:** {chunk_idx} / {total}")
-                st.markdown("**Content:**")
-                content = (
-                    source['text'][:500] + "..."
-                    if len(source['text']) > 500
-                    else source['text']
-                )
-                st.text(content)
+        # Render every source in one markdown block rather than an expander
+        # with several elements per source; text is escaped as HTML is enabled
+        parts = []
+        for i, source in _top_sources(result['sources'], DISPLAY_SOURCES):
+            parts.append(
+                f"<details><summary>Source {i} - Relevance Score: "
+                f"{source['relevance']:.2%}</summary>\n\n"
+                f"**Filename:** {html.escape(str(source['filename']))}\n\n"
+                f"**Chunk:** {source['chunk_index']} / {source['total_chunks']}\n\n"
+                f"**Content:**\n\n<pre>{html.escape(source['snippet'])}</pre>\n"
+                f"</details>"
+            )
+        st.markdown("\n".join(parts), unsafe_allow_html=True)
 
 
 def main():
     """Main application function."""
     initialize_session_state()
-    initialize_components()
 
-    # Header
+    # Header, drawn before the components are loaded so the page paints early
     st.title("📄 Enterprise Document Q&A System")
     st.markdown("Ask questions about your documents using AI-powered semantic search")
 
+    initialize_components()
+
     # Sidebar
     with st.sidebar:
         st.header("📁 Document Management")
 
         # File upload
-        uploaded_file = st.file_uploader(
-            "Upload PDF Document",
+        uploaded_files = st.file_uploader(
+            "Upload PDF Documents",
             type=['pdf'],
-            help="Upload a PDF document to ask questions about"
+            accept_multiple_files=True,
+            help="Upload one or more PDF documents to ask questions about"
         )
 
-        if uploaded_file:
-            if st.button("🔄 Process Document", type="primary"):
-                process_uploaded_file(uploaded_file)
+        if uploaded_files:
+            if st.button("🔄 Process Documents", type="primary"):
+                process_uploaded_files(uploaded_files)
 
         # Display loaded documents
         if st.session_state.doc_metadata:
@@ -197,7 +393,8 @@ def main():
                     st.session_state.vector_store.clear_collection()
                     st.session_state.documents_loaded = False
                     st.session_state.doc_metadata = []
-                    st.session_state.chat_history = []
+                    st.session_state.chat_history.clear()
+                    st.session_state.question_count = 0
                     st.success("Cleared all documents")
                     st.rerun()
 
@@ -219,42 +416,35 @@ def main():
 
             # Sample questions
             st.markdown("**Sample questions:**")
+            prewarm_sample_answers()
             col_q1, col_q2 = st.columns(2)
-            with col_q1:
-                if st.button("📋 Summarize the main points"):
-                    question = "Summarize the main points of this document"
-                if st.button("🔍 What are the key findings?"):
-                    question = "What are the key findings or conclusions?"
-            with col_q2:
-                if st.button("📊 What data is presented?"):
-                    question = "What data or statistics are presented?"
-                if st.button("⚠️ Are there any risks mentioned?"):
-                    question = "Are there any risks or limitations mentioned?"
+            sample_columns = (col_q1, col_q1, col_q2, col_q2)
+            for column, (label, sample) in zip(sample_columns, SAMPLE_QUESTIONS.items()):
+                with column:
+                    if st.button(label):
+                        question = sample
 
             # Process question
             if question:
                 with st.spinner("🤔 Thinking..."):
-                    result = st.session_state.rag_pipeline.query(question)
+                    result, is_new = get_answer(question)
 
-                    # Add to chat history
-                    st.session_state.chat_history.append({
-                        'question': question,
-                        'result': result
-                    })
-
-                # Display answer
+                # Display answer; a rerun while it streams interrupts this
+                # call, leaving the result unrecorded so it is asked again
                 display_answer(result)
 
+                if is_new:
+                    record_answer(question, result)
+
     with col2:
         st.header("📜 History")
 
         if st.session_state.chat_history:
             # Show recent questions
-            recent = reversed(st.session_state.chat_history[-5:])
-            for i, item in enumerate(recent, 1):
-                q_num = len(st.session_state.chat_history) - i + 1
+            recent = islice(reversed(st.session_state.chat_history), 5)
+            for item in recent:
                 q_preview = item['question'][:40]
-                with st.expander(f"Q{q_num}: {q_preview}..."):
+                with st.expander(f"Q{item['number']}: {q_preview}..."):
                     st.markdown(f"**Q:** {item['question']}")
                     st.markdown(f"**A:** {item['result']['answer'][:200]}...")
         else:
@@ -265,7 +455,7 @@ def main():
     st.markdown(
         """
         <div style='text-align: center'>
-            <p>Built with ChromaDB, PyPDF, and Claude AI • No LangChain • Custom RAG Pipeline</p>
+            <p>Built with ChromaDB, PyMuPDF, and Claude AI • No LangChain • Custom RAG Pipeline</p>
         </div>
         """,
         unsafe_allow_html=True
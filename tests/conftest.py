@@ -1,12 +1,9 @@
 """
 Pytest configuration and fixtures.
 """
+import pymupdf
 import pytest
-import sys
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.components.chunking import DocumentChunker
 
 
 @pytest.fixture
@@ -34,9 +31,29 @@ def sample_metadata():
     }
 
 
+@pytest.fixture(scope="module")
+def small_chunker():
+    """Provide a chunker with small chunks, shared by the tests of a module."""
+    return DocumentChunker(chunk_size=50, chunk_overlap=10)
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """Write a small two-page PDF and return its path."""
+    doc = pymupdf.open()
+    for text in ("First page text.", "Second page text."):
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    path = tmp_path / "sample.pdf"
+    doc.save(path)
+    doc.close()
+    return path
+
+
 @pytest.fixture(autouse=True)
-def env_setup(monkeypatch):
+def env_setup(monkeypatch, tmp_path):
     """Set up environment variables for testing."""
     monkeypatch.setenv('CHUNK_SIZE', '1000')
     monkeypatch.setenv('CHUNK_OVERLAP', '200')
     monkeypatch.setenv('CHROMA_PERSIST_DIRECTORY', './test_chroma_db')
+    monkeypatch.setenv('CHUNK_CACHE_DIR', str(tmp_path / 'chunk_cache'))
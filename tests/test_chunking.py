@@ -1,42 +1,57 @@
 """
 Unit tests for the document chunking component.
 """
+import numpy as np
+import pytest
 from src.components.chunking import DocumentChunker
 
 
+class WordEncoding:
+    """Minimal stand-in for a tiktoken encoding: one token per word."""
+
+    def __init__(self):
+        self.vocab = []
+
+    def _id(self, word):
+        if word not in self.vocab:
+            self.vocab.append(word)
+        return self.vocab.index(word)
+
+    def encode_ordinary_batch(self, texts):
+        return [[self._id(word) for word in text.split()] for text in texts]
+
+    def decode_batch(self, batch):
+        return [" ".join(self.vocab[i] for i in ids) for ids in batch]
+
+
 class TestDocumentChunker:
     """Test cases for DocumentChunker class."""
 
-    def test_init_default_params(self):
-        """Test initialization with default parameters."""
-        chunker = DocumentChunker()
-        assert chunker.chunk_size == 1000
-        assert chunker.chunk_overlap == 200
-
-    def test_init_custom_params(self):
-        """Test initialization with custom parameters."""
-        chunker = DocumentChunker(chunk_size=500, chunk_overlap=100)
-        assert chunker.chunk_size == 500
-        assert chunker.chunk_overlap == 100
+    @pytest.mark.parametrize('kwargs, expected', [
+        ({}, (1000, 200)),
+        ({'chunk_size': 500, 'chunk_overlap': 100}, (500, 100)),
+    ])
+    def test_init_params(self, kwargs, expected):
+        """Test initialization with default (from the environment) and custom parameters."""
+        chunker = DocumentChunker(**kwargs)
+        assert (chunker.chunk_size, chunker.chunk_overlap) == expected
 
-    def test_chunk_text_basic(self):
+    def test_chunk_text_basic(self, small_chunker):
         """Test basic text chunking."""
-        chunker = DocumentChunker(chunk_size=50, chunk_overlap=10)
         text = "This is a test. " * 20  # Create text longer than chunk_size
 
-        chunks = chunker.chunk_text(text)
+        chunks = small_chunker.chunk_text(text)
 
         assert len(chunks) > 1
         assert all('text' in chunk for chunk in chunks)
         assert all('metadata' in chunk for chunk in chunks)
 
-    def test_chunk_text_with_metadata(self):
+    def test_chunk_text_with_metadata(self, small_chunker):
         """Test chunking with custom metadata."""
-        chunker = DocumentChunker(chunk_size=50, chunk_overlap=10)
         text = "Sample text. " * 10
         metadata = {'filename': 'test.pdf', 'page': 1}
 
-        chunks = chunker.chunk_text(text, metadata)
+        chunks = small_chunker.chunk_text(text, metadata)
 
         assert all(chunk['metadata']['filename'] == 'test.pdf' for chunk in chunks)
         assert all(chunk['metadata']['page'] == 1 for chunk in chunks)
@@ -59,27 +74,108 @@ class TestDocumentChunker:
         assert len(chunks) == 1
         assert chunks[0]['text'] == text
 
-    def test_chunk_documents(self):
+    def test_chunk_text_respects_size_and_overlap(self, small_chunker):
+        """Test that chunks stay within chunk_size and overlap their neighbours."""
+        text = "This is a test. " * 20
+
+        chunks = [chunk['text'] for chunk in small_chunker.chunk_text(text)]
+
+        assert all(len(chunk) <= 50 for chunk in chunks)
+        for prev, nxt in zip(chunks, chunks[1:]):
+            overlap = nxt.split('.')[0] + '.'
+            assert prev.endswith(overlap)
+
+    def test_chunk_text_prefers_paragraph_breaks(self):
+        """Test that paragraph boundaries win over sentence boundaries."""
+        chunker = DocumentChunker(chunk_size=60, chunk_overlap=1)
+        text = "First sentence here. Second one is here.\n\nNext paragraph. More text."
+
+        chunks = chunker.chunk_text(text)
+
+        assert chunks[0]['text'] == "First sentence here. Second one is here."
+
+    def test_chunk_stream_matches_chunk_text(self):
+        """Test that streaming pages yields the same chunks as chunking the joined text."""
+        chunker = DocumentChunker(chunk_size=80, chunk_overlap=20)
+        pages = [f"Page {i} opens here. " * 6 for i in range(5)]
+
+        streamed = list(chunker.chunk_stream(iter(pages), {'filename': 'doc.pdf'}))
+        expected = chunker.chunk_text("\n\n".join(pages))
+
+        assert [c['text'] for c in streamed] == [c['text'] for c in expected]
+        assert [c['metadata']['chunk_index'] for c in streamed] == list(range(len(expected)))
+        assert all(c['metadata']['filename'] == 'doc.pdf' for c in streamed)
+
+    def test_compiled_splitter_matches_python(self, monkeypatch):
+        """Test that the Numba splitter produces the same spans as the Python one."""
+        pytest.importorskip('numba')
+        from src.components import chunking
+
+        chunker = DocumentChunker(chunk_size=60, chunk_overlap=15)
+        texts = [
+            "Intro line.\nFirst point here. Second point. " * 20 + "\n\nCafé ünïcode tail " * 10,
+            "word \udcff " * 40,  # lone surrogates are not encodable as UTF-32
+        ]
+
+        compiled = [chunker._split_spans(text) for text in texts]
+        monkeypatch.setattr(chunking, 'numba', None)
+
+        assert compiled == [chunker._split_spans(text) for text in texts]
+
+    def test_block_scan_matches_single_scan(self):
+        """Test that scanning in blocks finds the same breaks as one sequential scan."""
+        pytest.importorskip('numba')
+        from src.components.chunking import _scan_breaks
+
+        chunker = DocumentChunker(chunk_size=60, chunk_overlap=15)
+        # Newline runs and '. ' pairs straddle the small block boundaries
+        text = "a\n\n\n\nb. c \n\n\n. .\n" * 30
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+        single = _scan_breaks(codes, chunker._sep_codes, chunker._sep_lengths, len(text))
+        for block_size in (1, 3, 7):
+            blocked = _scan_breaks(codes, chunker._sep_codes, chunker._sep_lengths, block_size)
+            assert all((a == b).all() for a, b in zip(single, blocked))
+
+    def test_chunk_documents(self, small_chunker):
         """Test chunking multiple documents."""
-        chunker = DocumentChunker(chunk_size=50, chunk_overlap=10)
         documents = [
             {'text': 'Document one. ' * 10, 'metadata': {'file': 'doc1.pdf'}},
             {'text': 'Document two. ' * 10, 'metadata': {'file': 'doc2.pdf'}},
         ]
 
-        all_chunks = chunker.chunk_documents(documents)
+        all_chunks = small_chunker.chunk_documents(documents)
 
         assert len(all_chunks) > 0
         # Check that document_index was added to metadata
         assert all('document_index' in chunk['metadata'] for chunk in all_chunks)
 
-    def test_get_chunk_stats(self):
+    def test_init_invalid_mode(self):
+        """Test that unknown chunking modes are rejected."""
+        with pytest.raises(ValueError, match="Unsupported chunking mode"):
+            DocumentChunker(mode='bytes')
+
+    def test_chunk_documents_token_mode(self):
+        """Test token-mode chunking sizes chunks in tokens with overlap."""
+        chunker = DocumentChunker(
+            chunk_size=4, chunk_overlap=1, mode='token', encoding=WordEncoding()
+        )
+        documents = [
+            {'text': 'a b c d e f g', 'metadata': {'file': 'doc1.pdf'}},
+            {'text': 'h i', 'metadata': {'file': 'doc2.pdf'}},
+        ]
+
+        all_chunks = chunker.chunk_documents(documents)
+
+        assert [chunk['text'] for chunk in all_chunks] == ['a b c d', 'd e f g', 'h i']
+        assert [chunk['metadata']['document_index'] for chunk in all_chunks] == [0, 0, 1]
+
+    def test_get_chunk_stats(self, small_chunker):
         """Test chunk statistics calculation."""
-        chunker = DocumentChunker(chunk_size=50, chunk_overlap=10)
         text = "Sample text. " * 20
 
-        chunks = chunker.chunk_text(text)
-        stats = chunker.get_chunk_stats(chunks)
+        chunks = small_chunker.chunk_text(text)
+        stats = small_chunker.get_chunk_stats(chunks)
 
         assert 'total_chunks' in stats
         assert 'avg_chunk_size' in stats
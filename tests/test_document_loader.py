@@ -1,6 +1,7 @@
 """
 Unit tests for the document loader component.
 """
+import pymupdf
 import pytest
 from src.components.document_loader import DocumentLoader
 
@@ -34,5 +35,68 @@ class TestDocumentLoader:
         with pytest.raises(Exception):
             loader.load_from_bytes(b'', 'test.pdf')
 
-    # Note: Full PDF loading tests would require sample PDF files
-    # These would be integration tests rather than unit tests
+    def test_load_pdf_extracts_all_pages(self, sample_pdf):
+        """Test that text from every page is extracted in order."""
+        loader = DocumentLoader()
+        text = loader.load_pdf(str(sample_pdf))
+
+        assert text.index("First page text.") < text.index("Second page text.")
+
+    def test_load_from_bytes_matches_load_pdf(self, sample_pdf):
+        """Test that loading from bytes matches loading from disk."""
+        loader = DocumentLoader()
+
+        assert loader.load_from_bytes(sample_pdf.read_bytes(), 'sample.pdf') == \
+            loader.load_pdf(str(sample_pdf))
+
+    def test_load_pdf_parallel_matches_serial(self, sample_pdf):
+        """Test that parallel extraction preserves page order."""
+        serial = DocumentLoader().load_pdf(str(sample_pdf))
+        parallel = DocumentLoader(parallel=True, max_workers=2).load_pdf(str(sample_pdf))
+
+        assert parallel == serial
+
+    def test_iter_pages_is_lazy(self, sample_pdf):
+        """Test that pages are yielded one at a time."""
+        pages = DocumentLoader().iter_pages(str(sample_pdf))
+
+        assert "First page text." in next(pages)
+        assert "Second page text." in next(pages)
+
+    def test_load_pdf_skips_pages_without_text(self, tmp_path):
+        """Test that graphics-only pages are skipped."""
+        doc = pymupdf.open()
+        doc.new_page().draw_rect((72, 72, 200, 200))
+        doc.new_page().insert_text((72, 72), "Only text page.")
+        path = tmp_path / "mixed.pdf"
+        doc.save(path)
+        doc.close()
+
+        text = DocumentLoader().load_pdf(str(path))
+
+        assert text.strip() == "Only text page."
+
+    def test_load_pdf_extracts_form_field_only_page(self, tmp_path):
+        """Test that a page whose only text is a filled form field is not skipped."""
+        doc = pymupdf.open()
+        widget = pymupdf.Widget()
+        widget.field_type = pymupdf.PDF_WIDGET_TYPE_TEXT
+        widget.field_name = "name"
+        widget.field_value = "Form value text"
+        widget.rect = pymupdf.Rect(72, 72, 300, 100)
+        doc.new_page().add_widget(widget)
+        path = tmp_path / "form.pdf"
+        doc.save(path)
+        doc.close()
+
+        text = DocumentLoader().load_pdf(str(path))
+
+        assert "Form value text" in text
+
+    def test_get_metadata(self, sample_pdf):
+        """Test metadata extraction."""
+        loader = DocumentLoader()
+        metadata = loader.get_metadata(str(sample_pdf))
+
+        assert metadata['num_pages'] == 2
+        assert metadata['file_name'] == 'sample.pdf'
@@ -0,0 +1,66 @@
+"""
+Unit tests for the vector store component.
+"""
+import numpy as np
+import pytest
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from src.components.embeddings import VectorStore
+
+
+class CharEmbedding(EmbeddingFunction):
+    """Deterministic offline embedder built from character counts."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in input]
+
+    @staticmethod
+    def name():
+        return "test-char"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return CharEmbedding()
+
+
+@pytest.fixture
+def vector_store(tmp_path):
+    """Provide a vector store persisted under a temporary directory."""
+    return VectorStore(persist_directory=str(tmp_path), embedding_function=CharEmbedding())
+
+
+class TestVectorStore:
+    """Test cases for VectorStore class."""
+
+    def test_add_documents_skips_duplicate_content(self, vector_store):
+        """Test that repeated chunk text is stored once, within and across calls."""
+        chunks = [
+            {'text': 'alpha', 'metadata': {'filename': 'one.pdf'}},
+            {'text': 'beta', 'metadata': {'filename': 'one.pdf'}},
+            {'text': 'alpha', 'metadata': {'filename': 'two.pdf'}},
+        ]
+
+        assert vector_store.add_documents(chunks) == 2
+        assert vector_store.version == 1
+
+        assert vector_store.add_documents(chunks) == 0
+        assert vector_store.version == 1
+        assert vector_store.collection.count() == 2
+
+    def test_add_documents_normalizes_metadata(self, vector_store):
+        """Test that missing metadata is accepted and non-scalar values are stringified."""
+        chunks = [
+            {'text': 'no metadata'},
+            {'text': 'empty metadata', 'metadata': {}},
+            {'text': 'mixed', 'metadata': {'page': np.float64(2.0), 'tags': ['a', 'b']}},
+        ]
+
+        assert vector_store.add_documents(chunks) == 3
+
+        stored = vector_store.collection.get(where={'page': 2.0}, include=['metadatas'])
+        assert stored['metadatas'] == [{'page': 2.0, 'tags': "['a', 'b']"}]
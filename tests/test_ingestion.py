@@ -0,0 +1,117 @@
+"""
+Unit tests for the ingestion helpers.
+"""
+import pytest
+from src.components.ingestion import parse_and_chunk, parse_and_chunk_files
+
+
+class TestIngestion:
+    """Test cases for parsing and chunking uploaded files."""
+
+    def test_parse_and_chunk_tags_filename(self, sample_pdf):
+        """Test that chunks carry the source filename."""
+        chunks = parse_and_chunk(sample_pdf.read_bytes(), 'sample.pdf')
+
+        assert chunks
+        assert all(chunk['metadata']['filename'] == 'sample.pdf' for chunk in chunks)
+
+    def test_parse_and_chunk_matches_whole_text_chunking(self, sample_pdf):
+        """Test that chunking pages as they stream matches chunking the joined text."""
+        from src.components.chunking import DocumentChunker
+        from src.components.document_loader import DocumentLoader
+
+        data = sample_pdf.read_bytes()
+        text = DocumentLoader().load_from_bytes(data, 'sample.pdf')
+        expected = DocumentChunker(chunk_size=200, chunk_overlap=40).chunk_text(
+            text, {'filename': 'sample.pdf'}
+        )
+
+        chunks = parse_and_chunk(data, 'sample.pdf', chunk_size=200, chunk_overlap=40)
+
+        assert [c['text'] for c in chunks] == [c['text'] for c in expected]
+        assert [c['metadata'] for c in chunks] == [c['metadata'] for c in expected]
+
+    def test_parse_and_chunk_files_keeps_order_and_errors(self, sample_pdf):
+        """Test that results follow input order and failures are returned, not raised."""
+        data = sample_pdf.read_bytes()
+        files = [(data, 'one.pdf'), (b'not a pdf', 'bad.pdf'), (data, 'two.pdf')]
+
+        results = parse_and_chunk_files(files, max_workers=2)
+
+        assert results[0][0]['metadata']['filename'] == 'one.pdf'
+        assert isinstance(results[1], Exception)
+        assert results[2][0]['metadata']['filename'] == 'two.pdf'
+
+    def test_parse_and_chunk_files_reuses_worker_pool(self, sample_pdf):
+        """Test that multi-file batches share one long-lived worker pool."""
+        from src.components import ingestion
+
+        data = sample_pdf.read_bytes()
+        files = [(data, 'one.pdf'), (data, 'two.pdf')]
+        first = parse_and_chunk_files(files, max_workers=2, cache_dir='')
+        pool = ingestion._get_pool(2)
+        second = parse_and_chunk_files(files, max_workers=2, cache_dir='')
+
+        assert second == first
+        assert ingestion._get_pool(2) is pool
+
+    def test_parse_and_chunk_files_replaces_broken_pool(self, sample_pdf):
+        """Test that a pool whose worker died is replaced on the next batch."""
+        from src.components import ingestion
+
+        data = sample_pdf.read_bytes()
+        files = [(data, 'one.pdf'), (data, 'two.pdf')]
+        parse_and_chunk_files(files, max_workers=2, cache_dir='')
+        pool = ingestion._get_pool(2)
+        for process in list(pool._processes.values()):
+            process.kill()
+            process.join()
+
+        # Work submitted while the pool notices the dead worker may fail
+        parse_and_chunk_files(files, max_workers=2, cache_dir='')
+        results = parse_and_chunk_files(files, max_workers=2, cache_dir='')
+
+        assert all(not isinstance(chunks, Exception) for chunks in results)
+        assert ingestion._get_pool(2) is not pool
+
+    def test_parse_and_chunk_files_reuses_cached_chunks(self, sample_pdf, tmp_path, monkeypatch):
+        """Test that re-uploaded content is served from the chunk cache under its new name."""
+        from src.components import ingestion
+
+        data = sample_pdf.read_bytes()
+        first = parse_and_chunk_files([(data, 'one.pdf')], cache_dir=str(tmp_path))
+
+        def fail(*args):
+            raise AssertionError("file was parsed again")
+
+        monkeypatch.setattr(ingestion, 'parse_and_chunk', fail)
+        second = parse_and_chunk_files([(data, 'renamed.pdf')], cache_dir=str(tmp_path))
+
+        assert [c['text'] for c in second[0]] == [c['text'] for c in first[0]]
+        assert all(c['metadata']['filename'] == 'renamed.pdf' for c in second[0])
+
+    @pytest.mark.parametrize('content', ['[1]', '{"a": 1}', '[{"text": "x"}]', 'not json'])
+    def test_parse_and_chunk_files_ignores_malformed_cache(self, sample_pdf, tmp_path, content):
+        """Test that a corrupt or wrongly shaped cache file is treated as a miss."""
+        from src.components import ingestion
+
+        data = sample_pdf.read_bytes()
+        expected = parse_and_chunk_files([(data, 'one.pdf')], cache_dir=str(tmp_path))
+        for path in tmp_path.glob('*.json'):
+            path.write_text(content)
+
+        results = parse_and_chunk_files([(data, 'one.pdf')], cache_dir=str(tmp_path))
+
+        assert results == expected
+        assert ingestion._read_cache(next(tmp_path.glob('*.json')), 'one.pdf') == expected[0]
+
+    def test_parse_and_chunk_reuses_chunker_per_settings(self, sample_pdf):
+        """Test that files chunked with the same settings share one chunker."""
+        from src.components import ingestion
+
+        ingestion._get_chunker.cache_clear()
+        data = sample_pdf.read_bytes()
+        parse_and_chunk(data, 'one.pdf', chunk_size=500, chunk_overlap=50, mode='char')
+        parse_and_chunk(data, 'two.pdf', chunk_size=500, chunk_overlap=50, mode='char')
+
+        assert ingestion._get_chunker.cache_info().misses == 1
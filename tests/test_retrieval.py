@@ -0,0 +1,129 @@
+"""
+Unit tests for the RAG pipeline.
+"""
+from collections import deque
+
+import pytest
+from src.components.retrieval import RAGPipeline
+
+
+class FakeVectorStore:
+    """Vector store stand-in that records search calls."""
+
+    def __init__(self):
+        self.version = 0
+        self.calls = []
+
+    def search_batch(self, queries, top_k=4, filter_metadata=None):
+        self.calls.append(list(queries))
+        return [
+            [{'text': f"about {query}", 'metadata': {'filename': 'doc.pdf'}, 'distance': 0.25}]
+            for query in queries
+        ]
+
+
+@pytest.fixture
+def store():
+    """Provide a fresh fake vector store."""
+    return FakeVectorStore()
+
+
+def turn(question, answer=None, **result):
+    """Build a chat history turn as recorded by the app."""
+    return {'question': question, 'result': {'answer': answer, **result}}
+
+
+class TestRAGPipeline:
+    """Test cases for RAGPipeline class."""
+
+    def test_stream_failure_marks_result(self, store, monkeypatch):
+        """Test that a failed streamed answer sets 'error' on its result."""
+        pipeline = RAGPipeline(store, api_key='test-key')
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("rate limited")
+            yield
+
+        monkeypatch.setattr(pipeline, 'generate_answer_stream', fail)
+        result = pipeline.query("What is it?", stream=True)
+
+        assert 'error' not in result
+        answer = "".join(result['answer_stream'])
+        assert "rate limited" in answer
+        assert result['error'] == "rate limited"
+
+    def test_search_serves_repeated_queries_from_cache(self, store):
+        """Test that queries differing only in case and spacing hit the vector store once."""
+        pipeline = RAGPipeline(store, api_key='test-key')
+
+        first = pipeline._search(["What is it?"])
+        second = pipeline._search(["  what is IT? "])
+
+        assert store.calls == [["What is it?"]]
+        assert second == first
+
+    def test_search_evicts_least_recently_used(self, store):
+        """Test that the cache holds at most cache_size queries, dropping the oldest."""
+        pipeline = RAGPipeline(store, api_key='test-key', cache_size=2)
+
+        pipeline._search(["a", "b"])
+        pipeline._search(["a"])
+        pipeline._search(["c"])
+        pipeline._search(["a", "b"])
+
+        assert store.calls == [["a", "b"], ["c"], ["b"]]
+
+    def test_search_refetches_after_store_changes(self, store):
+        """Test that bumping the store version invalidates cached results."""
+        pipeline = RAGPipeline(store, api_key='test-key')
+
+        pipeline._search(["What is it?"])
+        store.version += 1
+        pipeline._search(["What is it?"])
+
+        assert len(store.calls) == 2
+
+    @pytest.mark.parametrize('container', [list, deque])
+    def test_query_with_chat_history_sends_recent_turns(self, store, monkeypatch, container):
+        """Test that only the last max_turns turns are sent, oldest first."""
+        pipeline = RAGPipeline(store, api_key='test-key')
+        sent = []
+        monkeypatch.setattr(
+            pipeline, 'generate_answer',
+            lambda query, context, history=None: sent.append(history) or "answer",
+        )
+        history = container([turn("Q1", "A1"), turn("Q2", "A2"), turn("Q3", "A3")])
+
+        result = pipeline.query_with_chat_history("Q4", history, max_turns=2)
+
+        assert result['answer'] == "answer"
+        assert sent == [[
+            {"role": "user", "content": "Q2"},
+            {"role": "assistant", "content": "A2"},
+            {"role": "user", "content": "Q3"},
+            {"role": "assistant", "content": "A3"},
+        ]]
+
+    def test_query_with_chat_history_skips_failed_turns(self, store, monkeypatch):
+        """Test that errored and unfinished turns are left out of the history."""
+        pipeline = RAGPipeline(store, api_key='test-key')
+        sent = []
+        monkeypatch.setattr(
+            pipeline, 'generate_answer',
+            lambda query, context, history=None: sent.append(history) or "answer",
+        )
+        history = [
+            turn("Q1", "A1"),
+            turn("Q2", "Error processing", error="rate limited"),
+            turn("Q3"),
+            turn("Q4", "A4"),
+        ]
+
+        pipeline.query_with_chat_history("Q5", history, max_turns=4)
+
+        assert sent == [[
+            {"role": "user", "content": "Q1"},
+            {"role": "assistant", "content": "A1"},
+            {"role": "user", "content": "Q4"},
+            {"role": "assistant", "content": "A4"},
+        ]]